@@ -28,26 +28,28 @@ def analyze_results(agg_data, n_runs, experiments_meta):
         'avg_undetected_per_run': avg_undetected
         })
 
-    # best/worst
-    by_eff = sorted(summary, key=lambda x: x['efficiency'], reverse=True)
-    by_retries = sorted(summary, key=lambda x: x['avg_retries_per_packet'])
-    by_undetected = sorted(summary, key=lambda x: x['avg_undetected_per_run'])
+    # best: only the leaders are printed, so a linear min/max replaces full sorts
+    # (ties resolve to the first encoder, as with a stable sort)
+    best_eff = max(summary, key=lambda x: x['efficiency'])
+    best_retries = min(summary, key=lambda x: x['avg_retries_per_packet'])
+    best_undetected = min(summary, key=lambda x: x['avg_undetected_per_run'])
 
     print("\n--- Automated analysis / wnioski ---")
-    print(f"Najlepsza efektywność: {by_eff[0]['name']} (eff={by_eff[0]['efficiency']:.4f})")
-    print(f"Najmniej retransmisji (średnio na pakiet): {by_retries[0]['name']} (retries={by_retries[0]['avg_retries_per_packet']:.3f})")
-    print(f"Najmniejsza liczba nierozpoznanych błędów (avg/run): {by_undetected[0]['name']} (undetected={by_undetected[0]['avg_undetected_per_run']:.3f})")
+    print(f"Najlepsza efektywność: {best_eff['name']} (eff={best_eff['efficiency']:.4f})")
+    print(f"Najmniej retransmisji (średnio na pakiet): {best_retries['name']} (retries={best_retries['avg_retries_per_packet']:.3f})")
+    print(f"Najmniejsza liczba nierozpoznanych błędów (avg/run): {best_undetected['name']} (undetected={best_undetected['avg_undetected_per_run']:.3f})")
 
-    # group by channel class
+    # group by channel class: running sums [eff, retries, undetected, n] in one pass
     channel_groups = {}
     for s in summary:
-        channel_groups.setdefault(s['channel'], []).append(s)
+        g = channel_groups.setdefault(s['channel'], [0.0, 0.0, 0.0, 0])
+        g[0] += s['efficiency']
+        g[1] += s['avg_retries_per_packet']
+        g[2] += s['avg_undetected_per_run']
+        g[3] += 1
     print("\nPorównanie wg klasy kanału:")
-    for ch, items in channel_groups.items():
-        avg_eff = sum(i['efficiency'] for i in items) / len(items)
-        avg_und = sum(i['avg_undetected_per_run'] for i in items) / len(items)
-        avg_ret = sum(i['avg_retries_per_packet'] for i in items) / len(items)
-        print(f"- {ch}: mean_eff={avg_eff:.4f}, mean_retries={avg_ret:.3f}, mean_undetected={avg_und:.3f} (n={len(items)})")
+    for ch, (sum_eff, sum_ret, sum_und, n) in channel_groups.items():
+        print(f"- {ch}: mean_eff={sum_eff / n:.4f}, mean_retries={sum_ret / n:.3f}, mean_undetected={sum_und / n:.3f} (n={n})")
 
     # krótkie wnioski (heurystyczne)
     print("\nHeurystyczne wnioski:")
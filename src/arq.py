@@ -1,49 +1,127 @@
 from typing import List, Callable, Tuple
-from copy import deepcopy
+from utils import Bits
 
 """
 Stop-and-Wait ARQ — prosty symulator retransmisji z potwierdzeniami.
 
 Funkcje / oczekiwane callables:
-- encode(packet: List[int]) -> List[int] : tworzy ramkę do wysyłki.
-- check_and_extract(frame: List[int]) -> (ok: bool, data: List[int]) : walidacja i ekstrakcja.
+- encode(packet: Bits) -> Bits : tworzy ramkę do wysyłki.
+- check_and_extract(frame: Bits) -> (ok: bool, data: Bits) : walidacja i ekstrakcja.
 - channel_tx(frame) / channel_ack(ack) : symulacja kanału danych i kanału ACK.
+  Kanał nie może modyfikować wejścia — ma zwrócić nowy bufor (tak działają
+  bsc_channel i gilbert_elliott_channel); ramka nie jest kopiowana przed wysyłką.
 
 stop_and_wait zwraca słownik ze statystykami:
 - total_sent_bits, payload_bits, retries_per_packet, undetected_errors.
 
+stop_and_wait_batched — ten sam protokół liczony rundami: w każdej rundzie
+ramki wszystkich niepotwierdzonych pakietów są sklejane w jeden strumień
+i przechodzą przez channel_tx jednym wywołaniem (ACK-i analogicznie przez
+channel_ack). Liczba wywołań kanału spada z O(pakiety * próby) do
+O(max_retries). Szum kolejnych ramek w rundzie pochodzi z jednego przebiegu
+kanału (dla Gilberta–Elliotta stan przechodzi między ramkami).
+
 Uwagi:
 - stop_and_wait nie waliduje wejść; statystyki liczą długości zwracane przez encode.
+- encode_cache (opcjonalny dict) zapamiętuje ramki dla powtarzających się pakietów
+  (klucz: bytes(pkt)); encode musi być deterministyczne. Ten sam dict można
+  przekazywać między wywołaniami dla tego samego kodera.
+- Ramka odebrana bez przekłamań (rx == wysłana ramka, porównanie buforów w C) nie
+  przechodzi przez check_and_extract — przyjmowane jest (True, pkt). Zakłada to,
+  że check_and_extract(encode(pkt)) == (True, pkt), co spełniają wszystkie kody
+  z coder.py (dla Hamminga: długość pakietu podzielna przez 4).
 """
 
-def stop_and_wait(packets: List[List[int]],
-                  encode: Callable[[List[int]], List[int]],
-                  check_and_extract: Callable[[List[int]], Tuple[bool, List[int]]],
-                  channel_tx: Callable[[List[int]], List[int]],
-                  channel_ack: Callable[[List[int]], List[int]],
-                  max_retries: int = 10) -> dict:
-    stats = {
-        'total_sent_bits': 0,
-        'payload_bits': 0,
-        'retries_per_packet': [],
-        'undetected_errors': 0
-    }
+# współdzielone ramki potwierdzeń (kanał nie modyfikuje wejścia)
+_ACK = bytearray(b'\x01')
+_NACK = bytearray(b'\x00')
+
+def stop_and_wait(packets: List[Bits],
+                  encode: Callable[[Bits], Bits],
+                  check_and_extract: Callable[[Bits], Tuple[bool, Bits]],
+                  channel_tx: Callable[[Bits], Bits],
+                  channel_ack: Callable[[Bits], Bits],
+                  max_retries: int = 10,
+                  encode_cache: dict = None) -> dict:
+    # liczniki w zmiennych lokalnych, zapis do stats raz na końcu
+    total_sent = 0
+    payload = 0
+    undetected = 0
+    retries_per_packet = []
+    record_retries = retries_per_packet.append
     for pkt in packets:
         retries = 0
-        stats['payload_bits'] += len(pkt)
-        encoded = encode(pkt)
-        success = False
+        payload += len(pkt)
+        if encode_cache is None:
+            encoded = encode(pkt)
+        else:
+            key = bytes(pkt)
+            encoded = encode_cache.get(key)
+            if encoded is None:
+                encoded = encode_cache[key] = encode(pkt)
+        encoded_len = len(encoded)
         while retries <= max_retries:
-            stats['total_sent_bits'] += len(encoded)
-            rx = channel_tx(deepcopy(encoded))
-            ok, data = check_and_extract(rx)
-            ack = [1 if ok else 0]
-            ack_rx = channel_ack(deepcopy(ack))
+            total_sent += encoded_len
+            rx = channel_tx(encoded)
+            if rx == encoded:
+                ok, data = True, pkt
+            else:
+                ok, data = check_and_extract(rx)
+            ack_rx = channel_ack(_ACK if ok else _NACK)
             if ack_rx and ack_rx[0] == 1:
                 if ok and data != pkt:
-                    stats['undetected_errors'] += 1
-                success = True
+                    undetected += 1
                 break
             retries += 1
-        stats['retries_per_packet'].append(retries)
+        record_retries(retries)
+    return {
+        'total_sent_bits': total_sent,
+        'payload_bits': payload,
+        'retries_per_packet': retries_per_packet,
+        'undetected_errors': undetected
+    }
+
+def stop_and_wait_batched(packets: List[Bits],
+                          encode: Callable[[Bits], Bits],
+                          check_and_extract: Callable[[Bits], Tuple[bool, Bits]],
+                          channel_tx: Callable[[Bits], Bits],
+                          channel_ack: Callable[[Bits], Bits],
+                          max_retries: int = 10) -> dict:
+    stats = {
+        'total_sent_bits': 0,
+        'payload_bits': sum(len(pkt) for pkt in packets),
+        'retries_per_packet': [max_retries + 1] * len(packets),
+        'undetected_errors': 0
+    }
+    frames = [encode(pkt) for pkt in packets]
+    retries = stats['retries_per_packet']
+    active = list(range(len(packets)))
+    for attempt in range(max_retries + 1):
+        if not active:
+            break
+        stream = bytearray()
+        for i in active:
+            stream.extend(frames[i])
+        stats['total_sent_bits'] += len(stream)
+        rx_stream = channel_tx(stream)
+
+        results = []
+        pos = 0
+        for i in active:
+            frame = frames[i]
+            rx = rx_stream[pos:pos + len(frame)]
+            results.append((True, packets[i]) if rx == frame else check_and_extract(rx))
+            pos += len(frame)
+        ack_rx = channel_ack(bytearray(ok for ok, _ in results))
+
+        still_active = []
+        for k, i in enumerate(active):
+            if ack_rx[k] == 1:
+                ok, data = results[k]
+                if ok and data != packets[i]:
+                    stats['undetected_errors'] += 1
+                retries[i] = attempt
+            else:
+                still_active.append(i)
+        active = still_active
     return stats
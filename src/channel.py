@@ -1,43 +1,86 @@
+import math
+import os
 import random
-from typing import List
+from utils import Bits
 
 """
 Modele kanałów binarnych używane w symulacji.
 
 Dostępne funkcje:
-- bsc_channel(bits, p_flip, seed=None)
+- bsc_channel(bits, p_flip, seed=None, rng=None)
     Binary Symmetric Channel: odwrócenie bitu z prawdopodobieństwem p_flip.
-    Używa lokalnej instancji random.Random(seed).
-- gilbert_elliott_channel(bits, p_gb, p_bg, err_good, err_bad, seed=None)
+    Zamiast losować decyzję dla
+    każdego bitu, losuje odstępy między przekłamaniami (rozkład geometryczny),
+    więc liczba wywołań RNG jest rzędu len(bits) * p_flip.
+- gilbert_elliott_channel(bits, p_gb, p_bg, err_good, err_bad, seed=None, rng=None)
     Gilbert–Elliott: model z dwoma stanami (G/B) i przejściami p_gb/p_bg.
     Błędy generowane z prawdopodobieństwem zależnym od stanu.
-    Używa lokalnego RNG (seed opcjonalny).
 
 Uwagi:
-- Funkcje nie walidują typów/zakresów parametrów.
-- seed=None -> instancja RNG z losowym ziarnem (różne przebiegi).
+- Funkcje nie walidują typów/zakresów parametrów; wynik zawsze jest nowym
+  bytearray (Bits), wejście nie jest modyfikowane.
+- rng: gotowa instancja random.Random współdzielona między wywołaniami — ziarno
+  ustawia się raz (np. na cały przebieg), bez inicjalizacji Mersenne Twistera
+  przy każdej ramce; kolejne ramki dostają wtedy kolejne (różne) wzorce szumu.
+- seed (gdy rng=None) -> nowa instancja random.Random(seed) na każde wywołanie.
+- seed=None i rng=None -> wspólny modułowy _DEFAULT_RNG (losowe ziarno,
+  odświeżane w procesach potomnych po fork).
 """
 
-def bsc_channel(bits: List[int], p_flip: float, seed: int = None) -> List[int]:
-    rnd = random.Random(seed)
-    return [b ^ (1 if rnd.random() < p_flip else 0) for b in bits]
+# 0 <-> 1 dla p_flip >= 1 (translate na całym buforze)
+_FLIP_ALL = bytes.maketrans(b'\x00\x01', b'\x01\x00')
 
-def gilbert_elliott_channel(bits: List[int], p_gb: float, p_bg: float,
+_DEFAULT_RNG = random.Random()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_DEFAULT_RNG.seed)
+
+def _get_rng(seed: int, rng: random.Random) -> random.Random:
+    if rng is not None:
+        return rng
+    if seed is None:
+        return _DEFAULT_RNG
+    return random.Random(seed)
+
+def bsc_channel(bits: Bits, p_flip: float, seed: int = None,
+                rng: random.Random = None) -> Bits:
+    out = bytearray(bits)
+    if p_flip <= 0:
+        return out
+    if p_flip >= 1:
+        return out.translate(_FLIP_ALL)
+    rand = _get_rng(seed, rng).random
+    log_q = math.log1p(-p_flip)
+    if log_q == 0.0:
+        # p_flip poniżej rozdzielczości float: odstęp nieskończony
+        return out
+    n = len(out)
+    # odstęp do następnego przekłamania: floor(log(U) / log(1-p)), U w (0, 1];
+    # trzymany jako float i porównywany z resztą ramki przed int() — dla
+    # bardzo małego p_flip iloraz wychodzi inf (int(inf) -> OverflowError)
+    gap = math.log(1.0 - rand()) / log_q
+    i = 0
+    while gap < n - i:
+        i += int(gap)
+        out[i] ^= 1
+        i += 1
+        gap = math.log(1.0 - rand()) / log_q
+    return out
+
+def gilbert_elliott_channel(bits: Bits, p_gb: float, p_bg: float,
                              err_good: float, err_bad: float,
-                             seed: int = None) -> List[int]:
-    rnd = random.Random(seed)
-    state = 'G'
-    out = []
+                             seed: int = None,
+                             rng: random.Random = None) -> Bits:
+    rand = _get_rng(seed, rng).random
+    # stan jako bool (False = G, True = B) zamiast napisów; kolejność losowań
+    # bez zmian: najpierw przejście stanu, potem błąd w nowym stanie
+    bad = False
+    out = bytearray()
+    append = out.append
     for bit in bits:
-        if state == 'G':
-            if rnd.random() < p_gb:
-                state = 'B'
-            err_p = err_good if state == 'G' else err_bad
-        else:
-            if rnd.random() < p_bg:
-                state = 'G'
-            err_p = err_bad if state == 'B' else err_good
-        out.append(bit ^ (1 if rnd.random() < err_p else 0))
+        if bad:
+            if rand() < p_bg:
+                bad = False
+        elif rand() < p_gb:
+            bad = True
+        append(bit ^ (rand() < (err_bad if bad else err_good)))
     return out
-
-
@@ -1,6 +1,8 @@
 import binascii
-from typing import List, Tuple
-from utils import bits_to_bytes, bytes_to_bits
+import ctypes
+import ctypes.util
+from typing import Callable, List, Optional, Sequence, Tuple
+from utils import Bits, bits_plus_bytes, bits_to_bytes
 
 """
 Mechanizmy kodowania i wykrywania błędów używane w symulacji ARQ.
@@ -9,44 +11,61 @@ Implementowane funkcje (przykładowo):
 - parity_encode / parity_check : prosty bit parzystości (even).
 - hamming74_encode_bits / hamming74_check_and_extract / hamming74_check_bits :
   Hamming(7,4) — kodowanie nibble (4 bity) -> 7 bitów, korekcja pojedynczych błędów.
+  Funkcje pojedynczego słowa (hamming74_encode, hamming74_check_and_extract)
+  zwracają krotki; funkcje strumieniowe zwracają Bits.
 - crc8_append / crc8_check : prosty CRC-8 (poly 0x07, default).
 - crc16_append / crc16_check : CRC-16/CCITT (poly 0x1021, init 0xFFFF).
+  Oba CRC liczone tablicowo (256 wpisów budowanych przy imporcie).
 - crc32_append / crc32_check : CRC-32 (binascii.crc32).
+  crc32_append_bytes / crc32_check_bytes : to samo na bytes, bez konwersji bitów.
+  Dla buforów >= 4 KiB używany jest libdeflate (ctypes), jeśli jest w systemie.
 - checksum16_append / checksum16_check : Internet-style 16-bit one's complement checksum.
 
 Uwagi:
-- Operacje CRC/checksum są bajtowe: używane są konwersje bits_to_bytes/bytes_to_bits.
+- Operacje CRC/checksum są bajtowe: dane pakowane przez bits_to_bytes, pole
+  kontrolne doklejane do ramki przez bits_plus_bytes (jeden bufor wyjściowy).
 - Wejścia zakładają wartości 0/1; brak ścisłej walidacji długości czy zakresów.
+- Wszystkie funkcje mają adnotacje typów (`mypy --strict coder.py utils.py`
+  przechodzi bez błędów), więc oba moduły można skompilować AOT:
+  `mypyc coder.py utils.py` w katalogu src/ (wymaga mypy, setuptools i
+  kompilatora C). Powstałe rozszerzenia .so są importowane zamiast plików .py;
+  pod mypyc typy parametrów są sprawdzane w runtime — funkcje przyjmujące Bits
+  wymagają bytearray.
 """
 
-def parity_encode(data_bits: List[int]) -> List[int]:
-    p = sum(data_bits) % 2
-    return data_bits + [p]
+# liczba jedynek przez bytearray.count (przeszukanie bufora w C)
+def parity_encode(data_bits: Bits) -> Bits:
+    return data_bits + (b'\x01' if data_bits.count(1) & 1 else b'\x00')
 
-def parity_check(rx_bits: List[int]) -> Tuple[bool, List[int]]:
-    data, p = rx_bits[:-1], rx_bits[-1]
-    ok = (sum(data) + p) % 2 == 0
-    return ok, data
+def parity_check(rx_bits: Bits) -> Tuple[bool, Bits]:
+    # parzystość liczona od razu po całej ramce (dane + bit kontrolny)
+    ok = (rx_bits.count(1) & 1) == 0
+    return ok, rx_bits[:-1]
 
-def hamming74_encode(nibble: List[int]) -> List[int]:
-    d = nibble + [0,0,0]
+def hamming74_encode(nibble: Sequence[int]) -> Tuple[int, ...]:
     d1,d2,d3,d4 = nibble
+    # [p1, p2, d1, p3, d2, d3, d4]
+    return (d1 ^ d2 ^ d4, d1 ^ d3 ^ d4, d1, d2 ^ d3 ^ d4, d2, d3, d4)
+
+# kod liniowy: słowo kodowe zależy tylko od nibble (16 możliwości)
+_HAMMING74_CODEWORDS: List[Tuple[int, ...]] = [hamming74_encode([(n >> 3) & 1, (n >> 2) & 1, (n >> 1) & 1, n & 1])
+                        for n in range(16)]
 
-    p1 = d1 ^ d2 ^ d4
-    p2 = d1 ^ d3 ^ d4
-    p3 = d2 ^ d3 ^ d4
-    return [p1, p2, d1, p3, d2, d3, d4]
-
-def hamming74_encode_bits(data_bits: List[int]) -> List[int]:
-    out = []
-    from utils import chunk
-    for nibble in chunk(data_bits, 4):
-        if len(nibble) < 4:
-            nibble = nibble + [0]*(4-len(nibble))
-        out.extend(hamming74_encode(nibble))
+# bajt -> dwa słowa kodowe (14 bitów): starszy nibble, potem młodszy
+_HAMMING74_BYTE_CODEWORDS: List[bytes] = [bytes(_HAMMING74_CODEWORDS[b >> 4] + _HAMMING74_CODEWORDS[b & 0xF])
+                                          for b in range(256)]
+
+def hamming74_encode_bits(data_bits: Bits) -> Bits:
+    # strumień pakowany w C do bajtów (bits_to_bytes), potem jedno odczytanie
+    # tablicy na 8 bitów danych (map + join); nieparzysta liczba nibble ->
+    # ostatni bajt niesie dopełnienie, którego słowo kodowe jest odcinane
+    n_nibbles = (len(data_bits) + 3) // 4
+    out = bytearray(b''.join(map(_HAMMING74_BYTE_CODEWORDS.__getitem__, bits_to_bytes(data_bits))))
+    if n_nibbles % 2:
+        del out[-7:]
     return out
 
-def hamming74_check_and_extract(rx7: List[int]) -> Tuple[bool, List[int]]:
+def _hamming74_decode_word(rx7: List[int]) -> Tuple[bool, List[int]]:
     p1,p2,d1,p3,d2,d3,d4 = rx7
     s1 = p1 ^ d1 ^ d2 ^ d4
     s2 = p2 ^ d1 ^ d3 ^ d4
@@ -63,102 +82,172 @@ def hamming74_check_and_extract(rx7: List[int]) -> Tuple[bool, List[int]]:
     data = [d1c,d2c,d3c,d4c]
     return ok, data
 
-def crc32_append(data_bits: List[int]) -> List[int]:
+# słowo 7-bitowe ma tylko 128 wartości: (ok, nibble) dla każdej liczone raz,
+# indeks = bity słowa w kolejności [p1,p2,d1,p3,d2,d3,d4] (p1 najstarszy)
+def _hamming74_decode_table() -> List[Tuple[bool, Tuple[int, ...]]]:
+    table = []
+    for w in range(128):
+        ok, nib = _hamming74_decode_word([(w >> i) & 1 for i in range(6, -1, -1)])
+        table.append((ok, tuple(nib)))
+    return table
+
+_HAMMING74_DECODE = _hamming74_decode_table()
+
+def hamming74_check_and_extract(rx7: Sequence[int]) -> Tuple[bool, Tuple[int, ...]]:
+    p1,p2,d1,p3,d2,d3,d4 = rx7
+    # wpis tablicy zwracany wprost (krotka niemodyfikowalna — bez kopii)
+    return _HAMMING74_DECODE[(p1 << 6) | (p2 << 5) | (d1 << 4) | (p3 << 3)
+                             | (d2 << 2) | (d3 << 1) | d4]
+
+def _split_check_field(rx_bits: Bits, n_bytes: int) -> Tuple[bytes, int]:
+    # (bajty danych, wartość pola kontrolnego z n_bytes końcowych bajtów);
+    # ramka wyrównana do bajtu jest pakowana raz i dzielona na granicy bajtu
+    if len(rx_bits) % 8 == 0:
+        full = bits_to_bytes(rx_bits)
+        return full[:-n_bytes], int.from_bytes(full[-n_bytes:], 'big')
+    k = 8 * n_bytes
+    return bits_to_bytes(rx_bits[:-k]), int.from_bytes(bits_to_bytes(rx_bits[-k:]), 'big')
+
+def _load_libdeflate_crc32() -> Optional[Callable[[int, bytes, int], int]]:
+    # opcjonalny natywny CRC-32 (libdeflate: składanie PCLMULQDQ); brak
+    # biblioteki -> None i wszystko liczy binascii
+    path = ctypes.util.find_library('deflate')
+    if path is None:
+        return None
+    try:
+        fn = ctypes.CDLL(path).libdeflate_crc32
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_uint32, ctypes.c_char_p, ctypes.c_size_t]
+    fn.restype = ctypes.c_uint32
+    # wskaźnik funkcji ctypes jest nietypowany (Any) — typ nadany tutaj
+    crc32: Callable[[int, bytes, int], int] = fn
+    return crc32
+
+_LIBDEFLATE_CRC32 = _load_libdeflate_crc32()
+# poniżej progu narzut wywołania ctypes (~0.8 us) przewyższa zysk
+# (zmierzone: libdeflate wygrywa z binascii dopiero od ~4 KiB)
+_NATIVE_CRC32_MIN_BYTES = 4096
+
+def _crc32_bytes(data: bytes) -> int:
+    # binascii.crc32 to CRC-32 z zlib (poly 0x04C11DB7, odbity) liczone w C.
+    # Sprzętowy CRC32 z SSE4.2 (pakiet crc32c) liczy inny wielomian
+    # (Castagnoli), więc nie jest zamiennikiem dla tego kodu; libdeflate_crc32
+    # liczy ten sam CRC-32 co zlib.
+    if _LIBDEFLATE_CRC32 is not None and len(data) >= _NATIVE_CRC32_MIN_BYTES:
+        # c_char_p przyjmuje tylko bytes (dla bytes to ten sam obiekt, bez kopii)
+        return _LIBDEFLATE_CRC32(0, bytes(data), len(data))
+    return binascii.crc32(data) & 0xffffffff
+
+# wariant bajtowy: dla wywołujących, którzy trzymają pakiety jako bytes
+def crc32_append_bytes(data: bytes) -> bytes:
+    return data + _crc32_bytes(data).to_bytes(4, 'big')
+
+def crc32_check_bytes(frame: bytes) -> Tuple[bool, bytes]:
+    if len(frame) < 4:
+        return False, b''
+    data = frame[:-4]
+    return _crc32_bytes(data) == int.from_bytes(frame[-4:], 'big'), data
+
+def crc32_append(data_bits: Bits) -> Bits:
     data_bytes = bits_to_bytes(data_bits)
-    crc = binascii.crc32(data_bytes) & 0xffffffff
+    crc = _crc32_bytes(data_bytes)
     crc_bytes = crc.to_bytes(4, 'big')
-    return data_bits + bytes_to_bits(crc_bytes)
+    return bits_plus_bytes(data_bits, crc_bytes)
 
-def crc32_check(rx_bits: List[int]) -> Tuple[bool, List[int]]:
+def crc32_check(rx_bits: Bits) -> Tuple[bool, Bits]:
     if len(rx_bits) < 32:
-        return False, []
-    data_bits = rx_bits[:-32]
-    crc_bits = rx_bits[-32:]
-    data_bytes = bits_to_bytes(data_bits)
-    crc_expected = int.from_bytes(bits_to_bytes(crc_bits), 'big')
-    crc_calc = binascii.crc32(data_bytes) & 0xffffffff
-    return crc_calc == crc_expected, data_bits
+        return False, bytearray()
+    data_bytes, crc_expected = _split_check_field(rx_bits, 4)
+    return _crc32_bytes(data_bytes) == crc_expected, rx_bits[:-32]
+
+def _crc8_table(poly: int) -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            # bez rozgałęzienia: maska 0xFF/0x00 z najstarszego bitu
+            crc = ((crc << 1) ^ (poly & -(crc >> 7))) & 0xFF
+        table.append(crc)
+    return table
+
+_CRC8_TABLE = _crc8_table(0x07)
 
 def _crc8_bytes(data: bytes, poly: int = 0x07, init: int = 0x00) -> int:
-    crc = init
+    # wariant tablicowy (Sarwate): jeden odczyt z tablicy na bajt
+    table = _CRC8_TABLE if poly == 0x07 else _crc8_table(poly)
+    crc = init & 0xFF
     for b in data:
-        crc ^= b
-        for _ in range(8):
-            crc = ((crc << 1) & 0xFF) ^ (poly if (crc & 0x80) else 0)
-    return crc & 0xFF
+        crc = table[crc ^ b]
+    return crc
 
-def crc8_append(data_bits: List[int]) -> List[int]:
+def crc8_append(data_bits: Bits) -> Bits:
     data_bytes = bits_to_bytes(data_bits)
     crc = _crc8_bytes(data_bytes)
     crc_b = crc.to_bytes(1, 'big')
-    return data_bits + bytes_to_bits(crc_b)
+    return bits_plus_bytes(data_bits, crc_b)
 
-def crc8_check(rx_bits: List[int]) -> Tuple[bool, List[int]]:
+def crc8_check(rx_bits: Bits) -> Tuple[bool, Bits]:
     if len(rx_bits) < 8:
-        return False, []
-    data_bits = rx_bits[:-8]
-    crc_bits = rx_bits[-8:]
-    data_bytes = bits_to_bytes(data_bits)
-    crc_expected = int.from_bytes(bits_to_bytes(crc_bits), 'big')
-    crc_calc = _crc8_bytes(data_bytes)
-    return crc_calc == crc_expected, data_bits
+        return False, bytearray()
+    data_bytes, crc_expected = _split_check_field(rx_bits, 1)
+    return _crc8_bytes(data_bytes) == crc_expected, rx_bits[:-8]
+
+def _crc16_ccitt_table(poly: int) -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ (poly & -(crc >> 15))) & 0xFFFF
+        table.append(crc)
+    return table
+
+_CRC16_CCITT_TABLE = _crc16_ccitt_table(0x1021)
 
 def _crc16_ccitt_bytes(data: bytes, poly: int = 0x1021, init: int = 0xFFFF) -> int:
+    table = _CRC16_CCITT_TABLE if poly == 0x1021 else _crc16_ccitt_table(poly)
     crc = init & 0xFFFF
     for b in data:
-        crc ^= (b << 8)
-        for _ in range(8):
-            crc = ((crc << 1) ^ poly) & 0xFFFF if (crc & 0x8000) else ((crc << 1) & 0xFFFF)
-    return crc & 0xFFFF
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ b]
+    return crc
 
-def crc16_append(data_bits: List[int]) -> List[int]:
+def crc16_append(data_bits: Bits) -> Bits:
     data_bytes = bits_to_bytes(data_bits)
     crc = _crc16_ccitt_bytes(data_bytes)
     crc_b = crc.to_bytes(2, 'big')
-    return data_bits + bytes_to_bits(crc_b)
+    return bits_plus_bytes(data_bits, crc_b)
 
-def crc16_check(rx_bits: List[int]) -> Tuple[bool, List[int]]:
+def crc16_check(rx_bits: Bits) -> Tuple[bool, Bits]:
     if len(rx_bits) < 16:
-        return False, []
-    data_bits = rx_bits[:-16]
-    crc_bits = rx_bits[-16:]
-    data_bytes = bits_to_bytes(data_bits)
-    crc_expected = int.from_bytes(bits_to_bytes(crc_bits), 'big')
-    crc_calc = _crc16_ccitt_bytes(data_bytes)
-    return crc_calc == crc_expected, data_bits
+        return False, bytearray()
+    data_bytes, crc_expected = _split_check_field(rx_bits, 2)
+    return _crc16_ccitt_bytes(data_bytes) == crc_expected, rx_bits[:-16]
 
 def _internet_checksum_bytes(data: bytes) -> int:
-    s = 0
-    it = iter(data)
-    for hi in it:
-        try:
-            lo = next(it)
-        except StopIteration:
-            lo = 0
-        word = (hi << 8) | lo
-        s += word
-        s = (s & 0xffff) + (s >> 16)
-    s = (s & 0xffff) + (s >> 16)
+    # suma słów 16-bit z przeniesieniem cyklicznym == wartość bufora modulo
+    # 0xFFFF (bo 2**16 ≡ 1), liczona jednym int.from_bytes w C
+    if len(data) % 2:
+        data = data + b'\x00'
+    s = int.from_bytes(data, 'big') % 0xffff
+    if s == 0 and any(data):
+        # niezerowa suma w arytmetyce U1 daje 0xFFFF, nie 0
+        s = 0xffff
     return (~s) & 0xffff
 
-def checksum16_append(data_bits: List[int]) -> List[int]:
+def checksum16_append(data_bits: Bits) -> Bits:
     data_bytes = bits_to_bytes(data_bits)
     chksum = _internet_checksum_bytes(data_bytes)
     chk_b = chksum.to_bytes(2, 'big')
-    return data_bits + bytes_to_bits(chk_b)
+    return bits_plus_bytes(data_bits, chk_b)
 
-def checksum16_check(rx_bits: List[int]) -> Tuple[bool, List[int]]:
+def checksum16_check(rx_bits: Bits) -> Tuple[bool, Bits]:
     if len(rx_bits) < 16:
-        return False, []
-    data_bits = rx_bits[:-16]
-    chksum_bits = rx_bits[-16:]
-    data_bytes = bits_to_bytes(data_bits)
-    chk_expected = int.from_bytes(bits_to_bytes(chksum_bits), 'big')
-    chk_calc = _internet_checksum_bytes(data_bytes)
-    return chk_calc == chk_expected, data_bits
+        return False, bytearray()
+    data_bytes, chk_expected = _split_check_field(rx_bits, 2)
+    return _internet_checksum_bytes(data_bytes) == chk_expected, rx_bits[:-16]
 
 # --- pomoc: dekodowanie całego bloku Hamming(7,4) ---
-def hamming74_check_bits(rx_bits: List[int]) -> Tuple[bool, List[int]]:
+def hamming74_check_bits(rx_bits: Bits) -> Tuple[bool, Bits]:
     """
     Sprawdza sekwencję bitów zakodowaną Hamming(7,4) (7-bitowe słowa).
     Zwraca (ok, data_bits) gdzie ok==True gdy wszystkie słowa przeszły walidację
@@ -166,13 +255,18 @@ def hamming74_check_bits(rx_bits: List[int]) -> Tuple[bool, List[int]]:
     """
     if len(rx_bits) % 7 != 0:
         # niepełne słowo -> traktujemy jako błąd
-        return False, []
-    data_out = []
+        return False, bytearray()
+    # jedna pętla po całym strumieniu; każde słowo dekodowane odczytem z
+    # _HAMMING74_DECODE (bez wywołań funkcji i kopii słów)
+    data_out = bytearray()
+    extend = data_out.extend
+    table = _HAMMING74_DECODE
     all_ok = True
-    from utils import chunk
-    for word in chunk(rx_bits, 7):
-        ok, nib = hamming74_check_and_extract(word)
+    it = iter(rx_bits)
+    for p1, p2, d1, p3, d2, d3, d4 in zip(it, it, it, it, it, it, it):
+        ok, nib = table[(p1 << 6) | (p2 << 5) | (d1 << 4) | (p3 << 3)
+                        | (d2 << 2) | (d3 << 1) | d4]
         if not ok:
             all_ok = False
-        data_out.extend(nib)
+        extend(nib)
     return all_ok, data_out
@@ -2,11 +2,12 @@
 Generator bitów i narzędzie do dzielenia na pakiety.
 
 Funkcje:
-- random_bitstream(length: int, seed: int|None) -> List[int]
-    Zwraca listę losowych bitów (0/1). Używa lokalnej instancji random.Random(seed)
-    — seed=None oznacza losowość systemową (różne przebiegi).
-- packetize(bits: List[int], payload_size: int) -> List[List[int]]
-    Dzieli listę bitów na pakiety o stałym payload_size; ostatni pakiet jest
+- random_bitstream(length: int, seed: int|None) -> Bits
+    Zwraca bufor losowych bitów (0/1). Używa lokalnej instancji random.Random(seed)
+    — seed=None oznacza losowość systemową (różne przebiegi). Bity losowane
+    hurtowo (randbytes) i rozwijane tablicowo przez bytes_to_bits.
+- packetize(bits: Bits, payload_size: int) -> List[Bits]
+    Dzieli strumień bitów na pakiety o stałym payload_size; ostatni pakiet jest
     dopełniany zerami.
 
 Uwagi:
@@ -15,16 +16,15 @@ Uwagi:
 
 import random
 from typing import List
-from utils import chunk
+from utils import Bits, bytes_to_bits
 
-def random_bitstream(length: int, seed: int = None) -> List[int]:
+def random_bitstream(length: int, seed: int = None) -> Bits:
     rnd = random.Random(seed)
-    return [rnd.getrandbits(1) for _ in range(length)]
+    return bytes_to_bits(rnd.randbytes((length + 7) // 8))[:length]
 
-def packetize(bits: List[int], payload_size: int) -> List[List[int]]:
-    packets = []
-    for p in chunk(bits, payload_size):
-        if len(p) < payload_size:
-            p = p + [0] * (payload_size - len(p))
-        packets.append(p)
-    return packets
+def packetize(bits: Bits, payload_size: int) -> List[Bits]:
+    # dopełnienie raz dla całego strumienia, potem same wycinki
+    pad = -len(bits) % payload_size
+    if pad:
+        bits = bits + bytes(pad)
+    return [bits[i:i + payload_size] for i in range(0, len(bits), payload_size)]
@@ -1,15 +1,24 @@
 from generator import random_bitstream, packetize
 from coder import checksum16_append, checksum16_check, crc16_append, crc16_check, crc8_append, crc8_check, hamming74_check_bits, parity_encode, parity_check, crc32_append, crc32_check, hamming74_encode_bits, hamming74_check_and_extract
 from channel import bsc_channel, gilbert_elliott_channel
-from arq import stop_and_wait
+from arq import stop_and_wait, stop_and_wait_batched
 from analysis import analyze_results
 import argparse
+import os
+import random
+from functools import partial
+from multiprocessing import Pool
 
 """
 Runner symulacji ARQ — demonstracja kodów i modeli kanału.
 
 Zawiera:
 - CLI (--seed) dla powtarzalności (seed=None -> losowy przebieg).
+  Fabryki kanałów tworzą jeden random.Random na przebieg (osobny dla kanału
+  danych i ACK), współdzielony przez wszystkie ramki tego przebiegu.
+- --batched: stop_and_wait_batched (jedno przejście kanału na rundę retransmisji).
+- --jobs N: przebiegi liczone równolegle w N procesach (0 -> wszystkie rdzenie).
+  Każdy przebieg ma własne ziarno (seed + run), więc wynik nie zależy od N.
 - Przykładowe eksperymenty: parity, Hamming(7,4), CRC8/16/32, checksum16.
 - Przykładowe kanały: BSC oraz Gilbert‑Elliott.
 
@@ -17,95 +26,115 @@ Uwagi:
 - Skrypt ma charakter demonstracyjny; parametry (rozmiar, BER, p_gb, ...) można rozszerzyć.
 """
 
+# experiment definitions (module scope so worker processes can reach them)
+EXPERIMENTS = {
+    'Parity': {
+        'encode': parity_encode,
+        'check': parity_check,
+        'tx_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(s)),
+        'ack_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(None if s is None else s+1000000)),
+        'channel': 'BSC',
+    },
+    'CRC32': {
+        'encode': crc32_append,
+        'check': crc32_check,
+        'tx_factory': lambda s: partial(gilbert_elliott_channel, p_gb=0.001, p_bg=0.1, err_good=0.001, err_bad=0.1, rng=random.Random(s)),
+        'ack_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(None if s is None else s+2000000)),
+        'channel': 'Gilbert-Elliott',
+    },
+    'CRC8': {
+        'encode': crc8_append,
+        'check': crc8_check,
+        'tx_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(s)),
+        'ack_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(None if s is None else s+3000000)),
+        'channel': 'BSC',
+    },
+    'CRC16': {
+        'encode': crc16_append,
+        'check': crc16_check,
+        'tx_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(s)),
+        'ack_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(None if s is None else s+4000000)),
+        'channel': 'BSC',
+    },
+    'Checksum16': {
+        'encode': checksum16_append,
+        'check': checksum16_check,
+        'tx_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(s)),
+        'ack_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(None if s is None else s+5000000)),
+        'channel': 'BSC',
+    },
+    'Hamming74': {
+        'encode': hamming74_encode_bits,
+        'check': hamming74_check_bits,
+        'tx_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(s)),
+        'ack_factory': lambda s: partial(bsc_channel, p_flip=0.01, rng=random.Random(None if s is None else s+6000000)),
+        'channel': 'BSC',
+    }
+}
+
+AGG_KEYS = ('total_sent_bits', 'payload_bits', 'sum_retries', 'count_retries', 'undetected_errors')
+
+def run_single(seed_run, total_bits=1024, payload_size=32, batched=False):
+    """Jeden niezależny przebieg wszystkich eksperymentów; zwraca sumy per eksperyment."""
+    arq = stop_and_wait_batched if batched else stop_and_wait
+    bits = random_bitstream(total_bits, seed=seed_run)
+    packets = packetize(bits, payload_size)
+
+    run_stats = {}
+    for name, exp in EXPERIMENTS.items():
+        tx_channel = exp['tx_factory'](seed_run)
+        ack_channel = exp['ack_factory'](seed_run)
+        stats = arq(
+            packets,
+            encode=exp['encode'],
+            check_and_extract=exp['check'],
+            channel_tx=tx_channel,
+            channel_ack=ack_channel,
+            max_retries=5
+        )
+        run_stats[name] = {
+            'total_sent_bits': stats['total_sent_bits'],
+            'payload_bits': stats['payload_bits'],
+            'sum_retries': sum(stats['retries_per_packet']),
+            'count_retries': len(stats['retries_per_packet']),
+            'undetected_errors': stats.get('undetected_errors', 0)
+        }
+    return run_stats
+
+def _run_single_star(task):
+    return run_single(*task)
+
+def merge_partials(agg, partials):
+    # sumy są całkowite, więc kolejność scalania (imap_unordered) nie ma znaczenia
+    for run_stats in partials:
+        for name, p in run_stats.items():
+            for key in AGG_KEYS:
+                agg[name][key] += p[key]
+
 def main():
     parser = argparse.ArgumentParser(description="Run ARQ simulation. Omit --seed for random signal.")
     parser.add_argument('--seed', type=int, default=None, help='Optional integer seed for reproducibility')
+    parser.add_argument('--batched', action='store_true', help='Send all pending frames through the channel in one pass per retransmission round')
+    parser.add_argument('--jobs', type=int, default=1, help='Worker processes for independent runs (0 = all cores)')
     args = parser.parse_args()
     seed = args.seed
+    jobs = args.jobs or os.cpu_count() or 1
 
     total_bits = 1024
     payload_size = 32
     N_RUNS = 500
 
-    # prepare aggregation containers for each experiment
-    experiments = {
-        'Parity': {
-            'encode': lambda p: parity_encode(p),
-            'check': lambda r: parity_check(r),
-            'tx_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=s)),
-            'ack_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=(None if s is None else s+1000000))),
-            'channel': 'BSC',
-        },
-        'CRC32': {
-            'encode': lambda p: crc32_append(p),
-            'check': lambda r: crc32_check(r),
-            'tx_factory': lambda s: (lambda b: gilbert_elliott_channel(b, p_gb=0.001, p_bg=0.1, err_good=0.001, err_bad=0.1, seed=s)),
-            'ack_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=(None if s is None else s+2000000))),
-            'channel': 'Gilbert-Elliott',
-        },
-        'CRC8': {
-            'encode': lambda p: crc8_append(p),
-            'check': lambda r: crc8_check(r),
-            'tx_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=s)),
-            'ack_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=(None if s is None else s+3000000))),
-            'channel': 'BSC',
-        },
-        'CRC16': {
-            'encode': lambda p: crc16_append(p),
-            'check': lambda r: crc16_check(r),
-            'tx_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=s)),
-            'ack_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=(None if s is None else s+4000000))),
-            'channel': 'BSC',
-        },
-        'Checksum16': {
-            'encode': lambda p: checksum16_append(p),
-            'check': lambda r: checksum16_check(r),
-            'tx_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=s)),
-            'ack_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=(None if s is None else s+5000000))),
-            'channel': 'BSC',
-        },
-        'Hamming74': {
-            'encode': lambda p: hamming74_encode_bits(p),
-            'check': lambda r: hamming74_check_bits(r),
-            'tx_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=s)),
-            'ack_factory': lambda s: (lambda b: bsc_channel(b, p_flip=0.01, seed=(None if s is None else s+6000000))),
-            'channel': 'BSC',
-        }
-    }
-
     # aggregator: sums and counts
-    agg = {}
-    for name in experiments:
-        agg[name] = {
-            'total_sent_bits': 0,
-            'payload_bits': 0,
-            'sum_retries': 0,
-            'count_retries': 0,
-            'undetected_errors': 0
-        }
+    agg = {name: dict.fromkeys(AGG_KEYS, 0) for name in EXPERIMENTS}
 
-    for run in range(N_RUNS):
-        seed_run = None if seed is None else seed + run
-
-        bits = random_bitstream(total_bits, seed=seed_run)
-        packets = packetize(bits, payload_size)
-
-        for name, exp in experiments.items():
-            tx_channel = exp['tx_factory'](seed_run)
-            ack_channel = exp['ack_factory'](seed_run)
-            stats = stop_and_wait(
-                packets,
-                encode=exp['encode'],
-                check_and_extract=exp['check'],
-                channel_tx=tx_channel,
-                channel_ack=ack_channel,
-                max_retries=5
-            )
-            agg[name]['total_sent_bits'] += stats['total_sent_bits']
-            agg[name]['payload_bits'] += stats['payload_bits']
-            agg[name]['sum_retries'] += sum(stats['retries_per_packet'])
-            agg[name]['count_retries'] += len(stats['retries_per_packet'])
-            agg[name]['undetected_errors'] += stats.get('undetected_errors', 0)
+    tasks = [(None if seed is None else seed + run, total_bits, payload_size, args.batched)
+             for run in range(N_RUNS)]
+    if jobs > 1:
+        with Pool(jobs) as pool:
+            chunksize = max(1, N_RUNS // (4 * jobs))
+            merge_partials(agg, pool.imap_unordered(_run_single_star, tasks, chunksize=chunksize))
+    else:
+        merge_partials(agg, map(_run_single_star, tasks))
 
     # compute and print averages
     print(f"Ran {N_RUNS} simulations. Aggregated (averages per run / per-packet):")
@@ -117,7 +146,7 @@ def main():
         efficiency = (avg_payload / avg_sent) if avg_sent else 0
         print(f"{name}: avg_sent_bits={avg_sent:.1f}, avg_payload_bits={avg_payload:.1f}, avg_retries_per_packet={avg_retries_per_packet:.3f}, avg_undetected_errors_per_run={avg_undetected:.3f}, efficiency={efficiency:.4f}")
 
-    analyze_results(agg, N_RUNS, experiments)
+    analyze_results(agg, N_RUNS, EXPERIMENTS)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,41 +4,84 @@ Narzędzia bitowe — konwersje i dzielenie na bloki.
 Funkcje:
 - bits_to_bytes(bits: Iterable[int]) -> bytes
     Konwertuje sekwencję bitów (0/1) do bytes (MSB pierwszy w bajcie).
+    Pakowanie w C: bytes(bits) -> ASCII '0'/'1' -> int(..., 2) -> to_bytes
+    (dla Bits i bytes pierwszy krok jest pomijany).
     Nie usuwa informacji o długości — brak metadata o dopełnieniu.
-- bytes_to_bits(data: bytes) -> List[int]
-    Rozbija bajty na listę bitów (MSB->LSB).
-- chunk(lst: List, n: int)
-    Generator zwracający podlisty o maks. długości n.
+- bytes_to_bits(data: bytes) -> Bits
+    Rozbija bajty na bity (MSB->LSB): tablica 256 gotowych 8-bajtowych wzorców
+    sklejana jednym b''.join.
+- bits_plus_bytes(bits: Bits, data: bytes) -> Bits
+    bits z doklejonymi bitami bajtów data (nowy bufor) — używane do pól CRC/checksum.
+- chunk(lst: Iterable, n: int)
+    Generator zwracający bloki o maks. długości n (dla sekwencji: wycinki
+    tego samego typu, np. podlisty). Dla bytes/bytearray/
+    memoryview (np. Bits) zwraca wycinki memoryview — bez kopiowania danych;
+    wycinek współdzieli bufor z wejściem. Dopóki żyje którykolwiek wycinek
+    (także niedokończony generator), bytearray wejściowego nie da się zmienić
+    rozmiarem: np. blocks = list(chunk(ba, 4)); ba.append(1) -> BufferError
+    (trzeba zwolnić wycinki albo skopiować je bytes(...)). Wejście bez len() (np. generator)
+    jest czytane strumieniowo po n elementów (bloki jako listy).
+
+Typ:
+- Bits — alias reprezentacji strumienia bitów (bytearray, jeden bajt 0/1 na bit),
+  używany w sygnaturach wszystkich modułów. Bufor ciągły: kopie, wycinki,
+  porównania i bytes(bits) działają na pamięci w C (bez obiektów int na bit).
+  Funkcje zwracające Bits zwracają bytearray; ramki porównywane są ze sobą
+  (bytearray != list), więc cały potok musi trzymać tę samą reprezentację.
 
 Uwagi:
-- Wejścia zakładają wartości 0/1; brak rygorystycznej walidacji.
+- Wejścia zakładają wartości 0/1; brak rygorystycznej walidacji (bits_to_bytes
+  nie maskuje już bitów przez & 1 — inne wartości dają błędny wynik lub ValueError).
 - bits_to_bytes dopełnia ostatni bajt zerami (big-endian w obrębie bajtu).
 """
 
-from typing import List, Iterable
+from collections.abc import Sequence
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Union
+
+# Jedno miejsce definiujące reprezentację strumienia bitów w całym potoku
+# (generator -> coder -> channel -> arq): bytearray z wartościami 0/1.
+Bits = bytearray
+
+# 0/1 -> b'0'/b'1', żeby bajty bitów dało się sparsować jednym int(..., 2)
+_BITS_TO_ASCII = bytes.maketrans(b'\x00\x01', b'01')
 
 def bits_to_bytes(bits: Iterable[int]) -> bytes:
-    b = 0
-    out = bytearray()
-    bits = list(bits)
-    for i, bit in enumerate(bits):
-        b = (b << 1) | (bit & 1)
-        if (i + 1) % 8 == 0:
-            out.append(b)
-            b = 0
-    rem = len(bits) % 8
-    if rem != 0:
-        b = b << (8 - rem)
-        out.append(b)
-    return bytes(out)
-
-def bytes_to_bits(data: bytes) -> List[int]:
-    out = []
-    for byte in data:
-        for i in range(7, -1, -1):
-            out.append((byte >> i) & 1)
-    return out
-
-def chunk(lst: List, n: int):
+    # bytes(bits), translate, int(.., 2) i to_bytes działają w C — brak pętli
+    # po bitach w interpreterze; ogon dopełniany zerami przesunięciem w lewo.
+    # Bits (bytearray) i bytes idą prosto do translate, bez kopii wejścia.
+    raw = bits if isinstance(bits, (bytes, bytearray)) else bytes(bits)
+    n = len(raw)
+    if n == 0:
+        return b''
+    pad = -n % 8
+    return (int(raw.translate(_BITS_TO_ASCII), 2) << pad).to_bytes((n + pad) // 8, 'big')
+
+# bajt -> 8 bajtów 0/1 (MSB->LSB), liczone raz przy imporcie
+_BYTE_TO_BITS: List[bytes] = [bytes((b >> i) & 1 for i in range(7, -1, -1)) for b in range(256)]
+
+def bytes_to_bits(data: bytes) -> Bits:
+    # odczyty tablicy i sklejanie w C (map + join), bez pętli w interpreterze
+    return bytearray(b''.join(map(_BYTE_TO_BITS.__getitem__, data)))
+
+def bits_plus_bytes(bits: Bits, data: bytes) -> Bits:
+    # == bits + bytes_to_bits(data), bez pośredniego bytearray
+    return bits + b''.join(map(_BYTE_TO_BITS.__getitem__, data))
+
+def chunk(lst: Iterable[Any], n: int) -> Iterator[Union[memoryview, Sequence[Any]]]:
+    if isinstance(lst, (bytes, bytearray, memoryview)):
+        # widoki na wspólny bufor zamiast kopii każdego bloku
+        mv = memoryview(lst)
+        for i in range(0, len(mv), n):
+            yield mv[i:i+n]
+        return
+    if not isinstance(lst, Sequence):
+        # leniwe źródło: bez materializacji całości (jak itertools.batched)
+        it = iter(lst)
+        block = list(islice(it, n))
+        while block:
+            yield block
+            block = list(islice(it, n))
+        return
     for i in range(0, len(lst), n):
         yield lst[i:i+n]